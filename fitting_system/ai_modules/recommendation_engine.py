@@ -3,8 +3,74 @@ Recommendation Engine
 Generates intelligent clothing recommendations based on measurements and skin tone
 """
 
-from typing import Dict, List, Tuple
-from django.db.models import Q
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+from django.db.models import Exists, F, OuterRef, Q
+
+
+@dataclass(frozen=True, slots=True)
+class Measurements:
+    """
+    Body measurements consumed by the recommendation engine.
+
+    Slotted attribute access replaces dict lookups on the hot paths; a
+    value of 0.0 means the measurement was not captured, matching the old
+    dict.get(..., 0) defaults.
+    """
+    height: float = 0.0
+    chest: float = 0.0
+    waist: float = 0.0
+    shoulder_width: float = 0.0
+    hip: float = 0.0
+    inseam: float = 0.0
+    torso_length: float = 0.0
+    arm_length: float = 0.0
+
+    @classmethod
+    def coerce(cls, measurements: Union[Dict[str, float], 'Measurements']) -> 'Measurements':
+        """Accept a plain dict at the API boundary, converting it once"""
+        if isinstance(measurements, cls):
+            return measurements
+        return cls(**{
+            field: float(value)
+            for field, value in measurements.items()
+            if field in cls.__dataclass_fields__
+        })
+
+
+@lru_cache(maxsize=64)
+def _colors_for(skin_tone: str, undertone: str) -> Tuple[str, ...]:
+    """Memoized color palette lookup for a (skin_tone, undertone) pair"""
+    from fitting_system.ai_modules.skin_tone import SkinToneAnalyzer
+
+    return tuple(SkinToneAnalyzer().get_recommended_colors(skin_tone, undertone))
+
+
+def _build_adjustment_table(adjustments, shapes, garments) -> np.ndarray:
+    """Flatten the body-shape adjustment dicts into a (shape, garment) matrix"""
+    return np.array(
+        [[adjustments[shape].get(garment, 0) for garment in garments]
+         for shape in shapes],
+        dtype=np.int8
+    )
+
+
+def _score_priorities(fit_match, has_size, has_color) -> np.ndarray:
+    """
+    Vectorized priority scoring kernel.
+
+    Scores a whole batch of products in one array expression:
+    base 5, +15 for matching fit, +10 for size in stock, +10 for color match.
+    """
+    return (5
+            + 15 * np.asarray(fit_match, dtype=np.int64)
+            + 10 * np.asarray(has_size, dtype=np.int64)
+            + 10 * np.asarray(has_color, dtype=np.int64))
 
 
 class RecommendationEngine:
@@ -15,7 +81,16 @@ class RecommendationEngine:
         'regular': {'min_ratio': 1.15, 'max_ratio': 1.4},
         'oversize': {'min_ratio': 0.0, 'max_ratio': 1.15}
     }
-    
+
+    # Fit thresholds hoisted out of FIT_RECOMMENDATIONS so the hot path
+    # reads plain attributes instead of nested dict lookups; the array
+    # forms drive the vectorized classifier
+    SLIM_MIN_RATIO = FIT_RECOMMENDATIONS['slim']['min_ratio']
+    REGULAR_MIN_RATIO = FIT_RECOMMENDATIONS['regular']['min_ratio']
+    FIT_THRESHOLDS = np.array([REGULAR_MIN_RATIO, SLIM_MIN_RATIO])
+    FIT_LABELS = np.array(['oversize', 'regular', 'slim'])
+
+
     # Conversion factor for width measurements to circumference estimates
     # Body scan captures width (front-to-back), multiply by ~2 to estimate circumference
     WIDTH_TO_CIRCUMFERENCE_FACTOR = 2.0
@@ -61,107 +136,192 @@ class RecommendationEngine:
     
     # Size order for adjustment calculations
     SIZE_ORDER = ['XS', 'S', 'M', 'L', 'XL', 'XXL', 'XXXL']
+    SIZE_INDEX = {size: index for index, size in enumerate(SIZE_ORDER)}
+
+    # BODY_SHAPE_ADJUSTMENTS flattened into a (shape, garment) offset matrix
+    # built once at class definition, so adjustments are array lookups
+    BODY_SHAPE_ORDER = tuple(BODY_SHAPE_ADJUSTMENTS)
+    GARMENT_ORDER = tuple(GARMENT_MEASUREMENTS)
+    BODY_SHAPE_INDEX = {shape: index for index, shape in enumerate(BODY_SHAPE_ORDER)}
+    GARMENT_INDEX = {garment: index for index, garment in enumerate(GARMENT_ORDER)}
+    ADJUSTMENT_TABLE = _build_adjustment_table(
+        BODY_SHAPE_ADJUSTMENTS, BODY_SHAPE_ORDER, GARMENT_ORDER
+    )
+    # Shapes whose adjustment row is all zeros ('rectangle', the default
+    # for unclassified scans) can skip the lookup entirely
+    ZERO_ADJUSTMENT_SHAPES = frozenset(
+        np.array(BODY_SHAPE_ORDER)[~ADJUSTMENT_TABLE.any(axis=1)]
+    )
+
+    # BodyScan fields that feed the measurements dict; the core four are
+    # always set, the rest are nullable for backward compatibility
+    MEASUREMENT_FIELDS = (
+        'height', 'chest', 'waist', 'shoulder_width',
+        'hip', 'inseam', 'torso_length', 'arm_length',
+    )
     
     def __init__(self):
-        pass
-    
-    def recommend_size(self, measurements: Dict[str, float]) -> str:
+        # Lazily-loaded cache of the (tiny, static) Size table so the
+        # range matching can run in-memory instead of one SELECT per call
+        self._size_cache = None
+
+    def _get_sizes(self) -> list:
+        """Return all sizes ordered by chest_min, cached per engine instance"""
+        if self._size_cache is None:
+            from fitting_system.models import Size
+            # Only the name and the chest/waist ranges are read by the matchers
+            self._size_cache = list(
+                Size.objects.only(
+                    'name', 'chest_min', 'chest_max', 'waist_min', 'waist_max'
+                ).order_by('chest_min')
+            )
+        return self._size_cache
+
+    def _measurements_from_scan(self, body_scan) -> Measurements:
+        """Build a Measurements record from a BodyScan, skipping unset fields"""
+        return Measurements(**{
+            field: float(value)
+            for field in self.MEASUREMENT_FIELDS
+            if (value := getattr(body_scan, field, None))
+        })
+
+    def recommend_size(self, measurements: Union[Dict[str, float], Measurements]) -> str:
         """
         Recommend clothing size based on measurements
-        
+
         Args:
-            measurements: Dict with 'height', 'chest', 'waist', 'shoulder_width'
-            
+            measurements: Measurements record (or dict) with 'height',
+                'chest', 'waist', 'shoulder_width'
+
         Returns:
             Recommended size (S, M, L, XL, XXL)
         """
-        from fitting_system.models import Size
-        
+        measurements = Measurements.coerce(measurements)
+
         # Convert width measurements to circumference estimates
         # Body scan captures width, but Size model uses circumference
-        chest = measurements.get('chest', 0) * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
-        waist = measurements.get('waist', 0) * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
-        height = measurements.get('height', 0)  # Height doesn't need conversion
-        shoulder = measurements.get('shoulder_width', 0) * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
-        
+        chest = measurements.chest * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
+        waist = measurements.waist * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
+
+        all_sizes = self._get_sizes()
+
+        if not all_sizes:
+            return 'M'  # Fallback if no sizes in database
+
         # Find matching size based on measurements
         # Priority: chest > waist > shoulder > height
-        matching_sizes = Size.objects.filter(
-            chest_min__lte=chest,
-            chest_max__gte=chest,
-            waist_min__lte=waist,
-            waist_max__gte=waist
-        )
-        
-        if matching_sizes.exists():
-            return matching_sizes.first().name
-        
+        for size in all_sizes:
+            if (size.chest_min <= chest <= size.chest_max
+                    and size.waist_min <= waist <= size.waist_max):
+                return size.name
+
         # If no exact match, find closest size based on chest measurement
-        all_sizes = Size.objects.all().order_by('chest_min')
-        
-        if not all_sizes.exists():
-            return 'M'  # Fallback if no sizes in database
-        
-        if chest < all_sizes.first().chest_min:
-            return all_sizes.first().name  # Smallest size
-        elif chest > all_sizes.last().chest_max:
-            return all_sizes.last().name  # Largest size
+        if chest < all_sizes[0].chest_min:
+            return all_sizes[0].name  # Smallest size
+        elif chest > all_sizes[-1].chest_max:
+            return all_sizes[-1].name  # Largest size
         else:
             # Find closest size
             for size in all_sizes:
                 if size.chest_min <= chest <= size.chest_max:
                     return size.name
-        
+
         # Default fallback
         return 'M'
 
+    def recommend_size_batch(self, chests, waists) -> np.ndarray:
+        """
+        Vectorized size recommendation for many scans at once.
+
+        Matches each chest/waist pair against the cached Size ranges with
+        array comparisons (one pass per size, sizes are few) instead of
+        per-scan Python loops — intended for offline jobs that refresh
+        recommendations for thousands of scans.
+
+        Args:
+            chests: Array-like of chest width measurements
+            waists: Array-like of waist width measurements
+
+        Returns:
+            Array of recommended size names
+        """
+        chests = np.asarray(chests, dtype=np.float64) * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
+        waists = np.asarray(waists, dtype=np.float64) * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
+
+        sizes = self._get_sizes()
+        if not sizes:
+            return np.full(chests.shape, 'M')
+
+        names = np.array([size.name for size in sizes])
+        chest_min = np.array([float(size.chest_min) for size in sizes])
+        chest_max = np.array([float(size.chest_max) for size in sizes])
+        waist_min = np.array([float(size.waist_min) for size in sizes])
+        waist_max = np.array([float(size.waist_max) for size in sizes])
+
+        # First size (in chest_min order) whose chest and waist ranges
+        # both contain the scan, mirroring the scalar matcher
+        matched = np.full(chests.shape, -1, dtype=np.intp)
+        for index in range(len(sizes)):
+            hit = ((matched == -1)
+                   & (chest_min[index] <= chests) & (chests <= chest_max[index])
+                   & (waist_min[index] <= waists) & (waists <= waist_max[index]))
+            matched[hit] = index
+
+        # Fallbacks, same as recommend_size: closest by chest range, then
+        # clamp to the smallest/largest size outside the covered range
+        for index in range(len(sizes)):
+            hit = ((matched == -1)
+                   & (chest_min[index] <= chests) & (chests <= chest_max[index]))
+            matched[hit] = index
+        matched[(matched == -1) & (chests < chest_min[0])] = 0
+        matched[(matched == -1) & (chests > chest_max[-1])] = len(sizes) - 1
+
+        recommended = np.full(chests.shape, 'M', dtype=names.dtype)
+        found = matched >= 0
+        recommended[found] = names[matched[found]]
+
+        return recommended
+
     
     def recommend_size_for_garment(
-        self, 
-        measurements: Dict[str, float], 
+        self,
+        measurements: Union[Dict[str, float], Measurements],
         garment_type: str,
         body_shape: str = 'rectangle'
     ) -> str:
         """
         Recommend size based on garment-specific measurements and body shape.
-        
+
         Args:
-            measurements: Body measurements dict
+            measurements: Body measurements record (or dict)
             garment_type: Type of garment ('shirt', 'pants', 'dress', 'jacket', 'skirt')
             body_shape: Body shape classification
-            
+
         Returns:
             Recommended size with body shape adjustment applied
         """
-        from fitting_system.models import Size
-        
+        measurements = Measurements.coerce(measurements)
+
         # Get garment configuration
         config = self.GARMENT_MEASUREMENTS.get(garment_type, self.GARMENT_MEASUREMENTS['shirt'])
         fit_focus = config['fit_focus']
-        
+
         # Convert width measurement to circumference estimate
-        focus_value = measurements.get(fit_focus, 0) * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
-        
-        # Find base size using the focus measurement
-        if fit_focus == 'chest':
-            matching_sizes = Size.objects.filter(
-                chest_min__lte=focus_value,
-                chest_max__gte=focus_value
-            )
-        elif fit_focus == 'waist':
-            matching_sizes = Size.objects.filter(
-                waist_min__lte=focus_value,
-                waist_max__gte=focus_value
-            )
-        else:
-            matching_sizes = Size.objects.filter(
-                chest_min__lte=focus_value,
-                chest_max__gte=focus_value
-            )
-        
-        if matching_sizes.exists():
-            base_size = matching_sizes.first().name
-        else:
+        focus_value = getattr(measurements, fit_focus, 0.0) * self.WIDTH_TO_CIRCUMFERENCE_FACTOR
+
+        # Find base size using the focus measurement against the cached Size table
+        base_size = None
+        for size in self._get_sizes():
+            if fit_focus == 'waist':
+                if size.waist_min <= focus_value <= size.waist_max:
+                    base_size = size.name
+                    break
+            else:
+                if size.chest_min <= focus_value <= size.chest_max:
+                    base_size = size.name
+                    break
+
+        if base_size is None:
             # Fallback to generic size recommendation
             base_size = self.recommend_size(measurements)
         
@@ -183,35 +343,80 @@ class RecommendationEngine:
         Returns:
             Adjusted size
         """
-        adjustment = self.BODY_SHAPE_ADJUSTMENTS.get(body_shape, {}).get(garment_type, 0)
-        
+        # Common case: unclassified scans default to 'rectangle', which
+        # (like any all-zero shape) never changes the size
+        if not body_shape or body_shape in self.ZERO_ADJUSTMENT_SHAPES:
+            return base_size
+
+        shape_index = self.BODY_SHAPE_INDEX.get(body_shape)
+        garment_index = self.GARMENT_INDEX.get(garment_type)
+
+        if shape_index is None or garment_index is None:
+            return base_size
+
+        adjustment = int(self.ADJUSTMENT_TABLE[shape_index, garment_index])
         if adjustment == 0:
             return base_size
-        
-        try:
-            current_index = self.SIZE_ORDER.index(base_size.upper())
-            new_index = current_index + adjustment
-            
-            # Clamp to valid range
-            new_index = max(0, min(new_index, len(self.SIZE_ORDER) - 1))
-            
-            return self.SIZE_ORDER[new_index]
-        except ValueError:
+
+        current_index = self.SIZE_INDEX.get(base_size.upper())
+        if current_index is None:
             # Size not found in order list
             return base_size
+
+        # Clamp to valid range
+        new_index = max(0, min(current_index + adjustment, len(self.SIZE_ORDER) - 1))
+
+        return self.SIZE_ORDER[new_index]
+
+    def apply_body_shape_adjustment_batch(
+        self,
+        base_size_indices,
+        body_shape: str,
+        garment_types
+    ) -> np.ndarray:
+        """
+        Vectorized size adjustment for a batch of products.
+
+        Args:
+            base_size_indices: Array-like of indices into SIZE_ORDER
+            body_shape: Body shape classification (shared by the batch)
+            garment_types: Sequence of garment types, one per product
+
+        Returns:
+            Array of adjusted size names
+        """
+        base_size_indices = np.asarray(base_size_indices)
+
+        shape_index = self.BODY_SHAPE_INDEX.get(body_shape)
+        if shape_index is None:
+            return np.array(self.SIZE_ORDER)[base_size_indices]
+
+        garment_indices = np.fromiter(
+            (self.GARMENT_INDEX.get(garment, self.GARMENT_INDEX['shirt'])
+             for garment in garment_types),
+            dtype=np.intp, count=len(garment_types)
+        )
+
+        adjusted = np.clip(
+            base_size_indices + self.ADJUSTMENT_TABLE[shape_index, garment_indices],
+            0, len(self.SIZE_ORDER) - 1
+        )
+        return np.array(self.SIZE_ORDER)[adjusted]
     
-    def recommend_fit(self, measurements: Dict[str, float]) -> str:
+    def recommend_fit(self, measurements: Union[Dict[str, float], Measurements]) -> str:
         """
         Recommend fit type based on body proportions
-        
+
         Args:
-            measurements: Dict with 'chest' and 'waist'
-            
+            measurements: Measurements record (or dict) with 'chest' and 'waist'
+
         Returns:
             Recommended fit: 'slim', 'regular', or 'oversize'
         """
-        chest = measurements.get('chest', 0)
-        waist = measurements.get('waist', 0)
+        measurements = Measurements.coerce(measurements)
+
+        chest = measurements.chest
+        waist = measurements.waist
         
         if waist == 0:
             return 'regular'
@@ -219,13 +424,41 @@ class RecommendationEngine:
         ratio = chest / waist
         
         # Determine fit based on chest-to-waist ratio
-        if ratio >= self.FIT_RECOMMENDATIONS['slim']['min_ratio']:
+        if ratio >= self.SLIM_MIN_RATIO:
             return 'slim'
-        elif ratio >= self.FIT_RECOMMENDATIONS['regular']['min_ratio']:
+        elif ratio >= self.REGULAR_MIN_RATIO:
             return 'regular'
         else:
             return 'oversize'
-    
+
+    def recommend_fit_batch(self, chests, waists) -> np.ndarray:
+        """
+        Vectorized fit classification for many scans at once.
+
+        Classifies all chest/waist ratios against the fit thresholds in one
+        searchsorted call instead of per-scan branching — useful for batch
+        jobs that regenerate recommendations for many scans.
+
+        Args:
+            chests: Array-like of chest measurements
+            waists: Array-like of waist measurements
+
+        Returns:
+            Array of fit labels ('slim', 'regular', or 'oversize')
+        """
+        chests = np.asarray(chests, dtype=np.float64)
+        waists = np.asarray(waists, dtype=np.float64)
+
+        ratios = chests / np.maximum(waists, 1e-9)
+
+        fits = self.FIT_LABELS[np.searchsorted(self.FIT_THRESHOLDS, ratios, side='right')]
+
+        # Match the scalar path: missing waist means 'regular'
+        fits[waists == 0] = 'regular'
+
+        return fits
+
+
     def recommend_colors(self, skin_tone: str, undertone: str = 'warm') -> List[str]:
         """
         Recommend colors based on skin tone and undertone
@@ -237,86 +470,75 @@ class RecommendationEngine:
         Returns:
             List of recommended color names
         """
-        from fitting_system.ai_modules.skin_tone import SkinToneAnalyzer
-        
-        analyzer = SkinToneAnalyzer()
-        return analyzer.get_recommended_colors(skin_tone, undertone)
+        return list(_colors_for(skin_tone, undertone))
     
     def recommend_products(
         self,
-        measurements: Dict[str, float],
+        measurements: Union[Dict[str, float], Measurements],
         skin_tone: str,
         gender: str = 'unisex',
         limit: int = 10
     ) -> List[Tuple[object, int]]:
         """
         Recommend products based on measurements, skin tone, and availability
-        
+
         Args:
-            measurements: Body measurements dict
+            measurements: Body measurements record (or dict)
             skin_tone: Skin tone category
-            gender: 'men', 'women', or 'unisex'
+            gender: 'men', 'women', 'unisex', or None for no gender filter
             limit: Maximum number of recommendations
             
         Returns:
             List of tuples (Product, priority_score)
         """
-        from fitting_system.models import Product, ProductVariant, Color
-        
+        from fitting_system.models import Product, ProductVariant
+
+        measurements = Measurements.coerce(measurements)
+
         # Get recommendations
         recommended_size = self.recommend_size(measurements)
         recommended_fit = self.recommend_fit(measurements)
-        recommended_color_names = self.recommend_colors(skin_tone)
-        
-        # Get recommended color objects
-        recommended_colors = Color.objects.filter(name__in=recommended_color_names)
-        
+        recommended_color_names = tuple(self.recommend_colors(skin_tone))
+
+        # Subqueries for stock/size/color availability, evaluated as
+        # EXISTS annotations in the product query instead of 4 queries
+        # per product. Color names go straight into the subquery filter;
+        # no need to materialize Color objects first.
+        available_variants = ProductVariant.objects.filter(
+            product=OuterRef('pk'),
+            inventory__quantity__gt=0  # Only available items
+        )
+
         # Filter products by gender only (not strict fit filtering)
         # This ensures we always have products to recommend
-        products = Product.objects.filter(
-            Q(gender=gender) | Q(gender='unisex')
-        )
-        
-        recommendations = []
-        
-        for product in products:
-            # Check if product has any available variants
-            available_variants = ProductVariant.objects.filter(
-                product=product,
-                inventory__quantity__gt=0  # Only available items
-            )
-            
-            if not available_variants.exists():
-                continue
-            
-            # Calculate priority score
-            priority = 0
-            
-            # Higher priority for matching fit type
-            if product.fit_type == recommended_fit:
-                priority += 15
-            
-            # Higher priority for products with recommended size in stock
-            size_variants = available_variants.filter(size__name=recommended_size)
-            if size_variants.exists():
-                priority += 10
-            
-            # Higher priority for products with recommended colors
-            matching_color_variants = available_variants.filter(
-                color__in=recommended_colors
+        products = Product.objects.all()
+        if gender:
+            products = products.filter(
+                Q(gender=gender) | Q(gender='unisex')
             )
-            if matching_color_variants.exists():
-                priority += 10
-            
-            # Add base priority
-            priority += 5
-            
-            recommendations.append((product, priority))
-        
-        # Sort by priority (descending) and limit results
-        recommendations.sort(key=lambda x: x[1], reverse=True)
+        products = products.annotate(
+            has_stock=Exists(available_variants),
+            has_size=Exists(available_variants.filter(size__name=recommended_size)),
+            has_color=Exists(available_variants.filter(color__name__in=recommended_color_names)),
+        ).filter(has_stock=True)
+
+        products = list(products)
+        if not products:
+            return []
+
+        # Score all products at once from the annotated flags
+        count = len(products)
+        priorities = _score_priorities(
+            np.fromiter((p.fit_type == recommended_fit for p in products),
+                        dtype=bool, count=count),
+            np.fromiter((p.has_size for p in products), dtype=bool, count=count),
+            np.fromiter((p.has_color for p in products), dtype=bool, count=count),
+        )
+
+        recommendations = list(zip(products, priorities.tolist()))
         
-        return recommendations[:limit]
+        # Top-limit by priority: O(N log K) instead of sorting the whole list
+        return heapq.nlargest(limit, recommendations, key=lambda x: x[1])
     
     def get_matching_product_variants(
         self,
@@ -345,23 +567,9 @@ class RecommendationEngine:
             List of dicts with product, size, color, and fit message
         """
         from fitting_system.models import Product, ProductVariant, Color, Size
-        
-        # Build measurements dict
-        measurements = {
-            'height': float(body_scan.height),
-            'chest': float(body_scan.chest),
-            'waist': float(body_scan.waist),
-            'shoulder_width': float(body_scan.shoulder_width)
-        }
-        if body_scan.hip:
-            measurements['hip'] = float(body_scan.hip)
-        if body_scan.inseam:
-            measurements['inseam'] = float(body_scan.inseam)
-        if body_scan.torso_length:
-            measurements['torso_length'] = float(body_scan.torso_length)
-        if body_scan.arm_length:
-            measurements['arm_length'] = float(body_scan.arm_length)
-        
+
+        measurements = self._measurements_from_scan(body_scan)
+
         body_shape = getattr(body_scan, 'body_shape', 'rectangle') or 'rectangle'
         undertone = getattr(body_scan, 'undertone', 'warm')
         
@@ -385,70 +593,101 @@ class RecommendationEngine:
         if fit_type and fit_type in ['slim', 'regular', 'oversize']:
             products = products.filter(fit_type=fit_type)
 
-        
-        for product in products:
+        # Fetch all in-stock variants for the candidate products in one query
+        # instead of two queries per product (classic N+1). Joining the
+        # inventory row means later stock reads on a variant are free, and
+        # the stock annotation exposes the quantity for priority tuning.
+        available_variants = ProductVariant.objects.filter(
+            product__in=products,
+            inventory__quantity__gt=0
+        ).select_related('size', 'color', 'inventory').annotate(
+            stock=F('inventory__quantity')
+        )
+
+        variants_by_product = defaultdict(list)
+        for variant in available_variants:
+            variants_by_product[variant.product_id].append(variant)
+
+        # Garment-specific size only depends on the product category, so
+        # compute it once per category up front (the set is small and fixed)
+        size_by_category = {
+            category: self.recommend_size_for_garment(measurements, category, body_shape)
+            for category in self.GARMENT_MEASUREMENTS
+        }
+
+        recommended_color_set = set(recommended_color_names)
+
+        # Score over lightweight rows instead of hydrating every Product;
+        # only the products that make the final cut are fetched as instances
+        for row in products.values('id', 'category', 'fit_type', 'name'):
             # Get garment-specific size for this product
-            rec_size = self.recommend_size_for_garment(
-                measurements, 
-                product.category, 
-                body_shape
-            )
-            
+            rec_size = size_by_category.get(row['category'], size_by_category['shirt'])
+
             # Check if product fit matches recommended fit
-            fit_matches = product.fit_type == recommended_fit
-            
-            # Priority 1: Exact size + recommended color + in stock
-            matching_variant = ProductVariant.objects.filter(
-                product=product,
-                size__name=rec_size,
-                color__name__in=recommended_color_names,
-                inventory__quantity__gt=0
-            ).select_related('size', 'color', 'product').first()
-            
+            fit_matches = row['fit_type'] == recommended_fit
+
+            # Scan the prefetched variants once:
+            # Priority 1: exact size + recommended color in stock
+            # Priority 2: exact size + any color in stock
+            matching_variant = None
+            size_only_variant = None
+            for variant in variants_by_product.get(row['id'], []):
+                if variant.size.name != rec_size:
+                    continue
+                if variant.color.name in recommended_color_set:
+                    matching_variant = variant
+                    break
+                if size_only_variant is None:
+                    size_only_variant = variant
+
             if matching_variant:
                 matching_products.append({
-                    'product': product,
+                    'product': row['id'],  # resolved to an instance below
+                    'product_name': row['name'],
                     'variant': matching_variant,
                     'recommended_size': rec_size,
                     'recommended_color': matching_variant.color.name,
                     'color_hex': matching_variant.color.hex_code,
-                    'fit_type': product.fit_type,
+                    'fit_type': row['fit_type'],
                     'is_perfect_match': True,
                     'fit_matches_recommendation': fit_matches,
                     'recommended_fit': recommended_fit,
-                    'fit_message': f"This {product.category} in size {rec_size} with {matching_variant.color.name} will fit you perfectly!"
+                    'fit_message': f"This {row['category']} in size {rec_size} with {matching_variant.color.name} will fit you perfectly!"
                 })
                 continue
-            
-            # Priority 2: Exact size + any color in stock
-            size_only_variant = ProductVariant.objects.filter(
-                product=product,
-                size__name=rec_size,
-                inventory__quantity__gt=0
-            ).select_related('size', 'color', 'product').first()
-            
+
             if size_only_variant:
                 matching_products.append({
-                    'product': product,
+                    'product': row['id'],  # resolved to an instance below
+                    'product_name': row['name'],
                     'variant': size_only_variant,
                     'recommended_size': rec_size,
                     'recommended_color': size_only_variant.color.name,
                     'color_hex': size_only_variant.color.hex_code,
-                    'fit_type': product.fit_type,
+                    'fit_type': row['fit_type'],
                     'is_perfect_match': False,
                     'fit_matches_recommendation': fit_matches,
                     'recommended_fit': recommended_fit,
-                    'fit_message': f"This {product.category} in size {rec_size} will fit you great!"
+                    'fit_message': f"This {row['category']} in size {rec_size} will fit you great!"
                 })
-        
+
         # Sort: products matching recommended fit first, then perfect matches, then by name
         matching_products.sort(key=lambda x: (
             not x['fit_matches_recommendation'],
-            not x['is_perfect_match'], 
-            x['product'].name
+            not x['is_perfect_match'],
+            x['product_name']
         ))
-        
-        return matching_products[:limit]
+
+        matching_products = matching_products[:limit]
+
+        # Hydrate full Product instances only for the returned entries
+        products_by_id = Product.objects.in_bulk(
+            [match['product'] for match in matching_products]
+        )
+        for match in matching_products:
+            match['product'] = products_by_id[match['product']]
+
+        return matching_products
 
     
     def generate_recommendations_for_scan(self, body_scan) -> List[object]:
@@ -463,76 +702,50 @@ class RecommendationEngine:
             List of created Recommendation objects
         """
         from fitting_system.models import Recommendation
-        
+
         # Build measurements dict including new fashion measurements
-        measurements = {
-            'height': float(body_scan.height),
-            'chest': float(body_scan.chest),
-            'waist': float(body_scan.waist),
-            'shoulder_width': float(body_scan.shoulder_width)
-        }
-        
-        # Add fashion-specific measurements if available
-        if body_scan.hip:
-            measurements['hip'] = float(body_scan.hip)
-        if body_scan.torso_length:
-            measurements['torso_length'] = float(body_scan.torso_length)
-        if body_scan.arm_length:
-            measurements['arm_length'] = float(body_scan.arm_length)
-        if body_scan.inseam:
-            measurements['inseam'] = float(body_scan.inseam)
-        
+        measurements = self._measurements_from_scan(body_scan)
+
         # Get body shape (with backward compatibility)
         body_shape = getattr(body_scan, 'body_shape', 'rectangle') or 'rectangle'
         
         # Get base recommendations
         base_recommended_size = self.recommend_size(measurements)
         recommended_fit = self.recommend_fit(measurements)
-        
+
+        # Garment-specific sizes depend only on the category, so compute
+        # them once here instead of once per saved recommendation
+        size_by_category = {
+            category: self.recommend_size_for_garment(measurements, category, body_shape)
+            for category in self.GARMENT_MEASUREMENTS
+        }
+
         # Use undertone for color recommendations (with backward compatibility)
         undertone = getattr(body_scan, 'undertone', 'warm')
         recommended_colors = self.recommend_colors(body_scan.skin_tone, undertone)
         
-        # Get product recommendations
-        product_recommendations = []
-        
-        for gender in ['men', 'women', 'unisex']:
-            recs = self.recommend_products(
-                measurements,
-                body_scan.skin_tone,
-                gender=gender,
-                limit=10
-            )
-            product_recommendations.extend(recs)
-        
-        # Remove duplicates and sort by priority
-        seen_products = set()
-        unique_recommendations = []
-        for product, priority in product_recommendations:
-            if product.id not in seen_products:
-                seen_products.add(product.id)
-                unique_recommendations.append((product, priority))
-        
-        unique_recommendations.sort(key=lambda x: x[1], reverse=True)
+        # Get product recommendations across all genders in one query
+        # (gender=None disables the gender filter, so no dedup pass needed)
+        unique_recommendations = self.recommend_products(
+            measurements,
+            body_scan.skin_tone,
+            gender=None,
+            limit=30
+        )
         
-        # Create Recommendation objects with garment-specific sizing
-        recommendation_objects = []
-        for product, priority in unique_recommendations[:10]:
-            # Get garment-specific size with body shape adjustment
-            recommended_size = self.recommend_size_for_garment(
-                measurements, 
-                product.category,
-                body_shape
-            )
-            
-            rec = Recommendation.objects.create(
+        # Create Recommendation objects with garment-specific sizing,
+        # saved in a single bulk INSERT instead of one query per row
+        colors_text = ', '.join(recommended_colors[:5])
+        recommendation_objects = [
+            Recommendation(
                 body_scan=body_scan,
                 product=product,
-                recommended_size=recommended_size,
+                recommended_size=size_by_category.get(product.category, base_recommended_size),
                 recommended_fit=recommended_fit,
-                recommended_colors=', '.join(recommended_colors[:5]),
+                recommended_colors=colors_text,
                 priority=priority
             )
-            recommendation_objects.append(rec)
-        
-        return recommendation_objects
+            for product, priority in unique_recommendations[:10]
+        ]
+
+        return Recommendation.objects.bulk_create(recommendation_objects)
@@ -5,6 +5,7 @@ Uses MediaPipe Face Detection to analyze skin tone
 
 import cv2
 import numpy as np
+from dataclasses import dataclass
 from typing import Tuple, Optional
 
 try:
@@ -209,15 +210,16 @@ class SkinToneAnalyzer:
         else:
             return 'dark'
     
-    def get_recommended_colors(self, skin_tone: str) -> list:
+    def get_recommended_colors(self, skin_tone: str, undertone: str = 'warm') -> list:
         """
         Get recommended clothing colors based on skin tone
-        
+
         Args:
             skin_tone: Skin tone category ('light', 'medium', or 'dark')
-            
+            undertone: Skin undertone ('warm' or 'cool')
+
         Returns:
-            Dictionary with undertone details
+            List of recommended color names
         """
         color_recommendations = {
             'light': [
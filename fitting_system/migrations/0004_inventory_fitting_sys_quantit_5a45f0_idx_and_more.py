@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-08-31 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitting_system', '0003_bodyscan_arm_length_bodyscan_body_shape_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['quantity'], name='fitting_sys_quantit_5a45f0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='size',
+            index=models.Index(fields=['chest_min', 'chest_max'], name='fitting_sys_chest_m_432d2e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='size',
+            index=models.Index(fields=['waist_min', 'waist_max'], name='fitting_sys_waist_m_3bb36b_idx'),
+        ),
+    ]
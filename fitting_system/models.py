@@ -17,7 +17,12 @@ class Size(models.Model):
     
     class Meta:
         ordering = ['id']
-    
+        indexes = [
+            # Range probes used by size matching
+            models.Index(fields=['chest_min', 'chest_max']),
+            models.Index(fields=['waist_min', 'waist_max']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -106,7 +111,11 @@ class Inventory(models.Model):
     
     class Meta:
         verbose_name_plural = 'Inventories'
-    
+        indexes = [
+            # Availability checks filter on quantity > 0 constantly
+            models.Index(fields=['quantity']),
+        ]
+
     def __str__(self):
         return f"{self.product_variant} - Stock: {self.quantity}"
     